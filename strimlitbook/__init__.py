@@ -8,5 +8,5 @@ cells in Streamlit web app scripts. Identical conversion.
 __version__ = "0.1.0"
 
 from .parse import StreamlitBook
-from .reader import read_ipynb
+from .reader import read_ipynb, read_ipynb_cached, read_ipynbs
 from .utilities import *
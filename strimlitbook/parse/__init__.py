@@ -5,5 +5,4 @@ from .parse import StreamlitBook, Cell, Markdown, Code
 from ..utilities import _create_white_bg, _display_image, _display_dataframe, \
     _display_plotly, _display_vega_lite
 
-from .outputs import _parse_error_output, _parse_stream_output, _parse_image_output, \
-    _parse_html_output, _parse_plotly_output, _parse_plain_text_output
+from .outputs import _parse_output, _join_text
@@ -1,197 +1,120 @@
-def _parse_stream_output(output):
-    """
-    Parse a text output of a code cell.
-    The output_type in the notebook JSON is given as "stream".
-
-    Parameters
-    ----------
-    output : dict
-        A single code cell output as a dictionary.
-
-    Returns
-    -------
-        parsed_output : dict
-            A dictionary containing the parsed output with "stdout" key.
-
-    Notes
-    -----
-        The difference between this function and _parse_plain_text_output is that this
-        function only parses outputs of the Python print function.
-        While _parse_plain_text_output parses all text outputs from executing the code
-        cell by running Shift + Enter or Ctrl + Enter commands.
-    """
-    parsed_output = dict()
-
-    if output['output_type'] == "stream":
-        parsed_output['stdout'] = ''.join(output['text'])
-    else:
-        parsed_output = None
-
-    return parsed_output
-
-
-def _parse_plotly_output(output):
-    """
-    Parse a Plotly HTML code of a code cell.
-    The output_type in the notebook JSON is given as "application/vnd.plotly.v1+json"
-    under the "data" key.
-
-    Parameters
-    ----------
-    output : dict
-        A single code cell output as a dictionary.
-        
-
-    Returns
-    -------
-        parsed_output : dict
-            A dictionary containing the parsed output with a dictionary of data,
-            layout, and config items under the "plotly_fig" key.
-    """
-    parsed_output = dict()
-
-    # If output type is either display_data or execute_result, the output is media type
-    if output['output_type'] in ("display_data", "execute_result"):
-        # If the below key exists, the output is Plotly figure
-        plotly_key = "application/vnd.plotly.v1+json"
-        if plotly_key in output['data'].keys():
-            plotly_data = output['data'][plotly_key]['data']
-            plotly_layout = output['data'][plotly_key]['layout']
-
-            # If config key exists in Plotly output dict,
-            # user passed custom config to the chart
-            if "config" in output['data'][plotly_key].keys():
-                plotly_config = output['data'][plotly_key]['config']
-            else:
-                plotly_config = None
-
-            # Combine all parts for a Plotly output
-            parsed_output["plotly_fig"] = {"data": plotly_data,
-                                           "layout": plotly_layout,
-                                           "config": plotly_config}
-    else:
-        parsed_output = None
-
-    return parsed_output
-
-
-def _parse_html_output(output):
-    """
-    Parse HTML of a code cell. The output_type in the notebook JSON is given as
-    "text/html" under the "data" key.
-
-    Parameters
-    ----------
-    output : dict
-        A single code cell output as a dictionary.
-
-    Returns
-    -------
-        parsed_output : dict
-            A dictionary containing the parsed output with "text/html" key.
-    """
-    parsed_output = dict()
-    plotly_key = "application/vnd.plotly.v1+json"
-
-    if output['output_type'] in ("display_data", "execute_result"):
-        if ("text/html" in output['data'].keys()) and \
-                (plotly_key not in output['data'].keys()):
-            parsed_output['text/html'] = ''.join(output['data']['text/html'])
-        else:
-            parsed_output = None
-    else:
-        parsed_output = None
-
-    return parsed_output
-
-
-def _parse_image_output(output):
-    """
-    Parse binary image data of a code cell. The output_type in the notebook JSON is given
-    as "image/png" under the "data" key.
-
-    Parameters
-    ----------
-    output : dict
-        A single code cell output as a dictionary.
-
-    Returns
-    -------
-        parsed_output : dict
-            A dictionary containing the parsed output with "image/png" key.
-    """
-    parsed_output = dict()
-    plotly_key = "application/vnd.plotly.v1+json"
-
-    if (output['output_type'] in ("display_data", "execute_result")) and \
-            (plotly_key not in output['data'].keys()):
-        if "image/png" in output['data'].keys():
-            parsed_output['image/png'] = output['data']['image/png'].strip()
-        else:
-            parsed_output = None
-    else:
-        parsed_output = None
-
-    return parsed_output
-
-
-def _parse_plain_text_output(output):
-    """
-    Parse a text output of a code cell after it was run with Shift + Enter or Ctrl + Enter
-    commands. See notes on the difference between _parse_stream_output and this function.
-    The output_type in the notebook JSON is given as "text/plain".
-
-    Parameters
-    ----------
-    output : dict
-        A single code cell output as a dictionary.
-
-    Returns
-    -------
-        parsed_output : dict
-            A dictionary containing the parsed output with "text/plain" key.
-
-    Notes
-    -----
-        The difference between this function and _parse_stream_output is that
-        _parse_stream_output function only parses outputs of the Python print function.
-        While this function parses all text outputs from executing the code
-        cell by running Shift + Enter or Ctrl + Enter commands.
-    """
-    parsed_output = dict()
-
-    if output['output_type'] in ("display_data", "execute_result"):
-        if ("text/plain" in output['data'].keys()) and \
-                ("text/html" not in output['data'].keys()):
-            parsed_output['text/plain'] = ''.join(output['data']['text/plain'])
-        else:
-            parsed_output = None
-    else:
-        parsed_output = None
-
-    return parsed_output
-
-
-def _parse_error_output(output):
-    """
-    Parse an error output of a code cell. The output_type in the notebook JSON is given as
-    "error" and the error name is under "ename".
-
-    Parameters
-    ----------
-    output : dict
-        A single code cell output as a dictionary.
-
-    Returns
-    -------
-        parsed_output : dict
-            A dictionary containing the parsed output with "error" key.
-    """
-    parsed_output = dict()
-
-    if output['output_type'] == "error":
-        parsed_output['error'] = output['ename']
-    else:
-        parsed_output = None
-
-    return parsed_output
+"""
+A module that parses raw code-cell outputs into displayable pieces.
+"""
+import sys
+
+# MIME keys contain '/' and '+' so the compiler does not intern them the
+# way it interns identifier-like literals; intern them explicitly so the
+# hot dict lookups and equality checks can resolve by identity
+_PLOTLY_KEY = sys.intern("application/vnd.plotly.v1+json")
+_HTML_KEY = sys.intern("text/html")
+_PNG_KEY = sys.intern("image/png")
+_PLAIN_KEY = sys.intern("text/plain")
+
+# Displayable MIME keys in the order of importance, plus a frozenset for
+# the single C-level intersection done per media output
+_MIME_PRIORITY = (_PLOTLY_KEY, _HTML_KEY, _PNG_KEY, _PLAIN_KEY)
+_MIME_SET = frozenset(_MIME_PRIORITY)
+
+
+def _join_text(text):
+    """
+    Join a notebook text field into a single string.
+
+    Notebook JSON stores text fields either as a list of lines or already
+    as a plain string; the join is skipped for the string case.
+
+    Parameters
+    ----------
+    text : list or str
+        A "source" or "text" field from the notebook JSON.
+
+    Returns
+    -------
+        joined_text : str
+            The field contents as a single string.
+    """
+    if isinstance(text, str):
+        return text
+    return ''.join(text)
+
+
+def _parse_plotly_data(plotly_dict):
+    """
+    Assemble the parts of a raw Plotly figure dictionary.
+
+    Parameters
+    ----------
+    plotly_dict : dict
+        The value stored under the plotly MIME key of a media output.
+
+    Returns
+    -------
+        fig_dict : dict
+            A dictionary of the figure's data, layout and config items.
+    """
+    # The config key only exists when the user passed a custom config
+    # to the chart; .get resolves it in one lookup with no branch
+    return {"data": plotly_dict['data'],
+            "layout": plotly_dict['layout'],
+            "config": plotly_dict.get('config')}
+
+
+def _parse_output(output):
+    """
+    Parse a single raw cell output into a displayable piece.
+
+    Dispatches once on the output's "output_type": stream and error
+    outputs are returned directly, while display_data/execute_result
+    outputs are resolved by MIME key in the order of importance
+    (plotly, html, image, plain text).
+
+    Parameters
+    ----------
+    output : dict
+        A single code cell output as a dictionary.
+
+    Returns
+    -------
+        parsed_output : tuple or None
+            A (display_key, payload) pair where the display key is one
+            of "stdout", "error", "plotly_fig", "text/html", "image/png"
+            or "text/plain", or None when the output carries nothing
+            displayable.
+
+    Notes
+    -----
+        "stdout" covers outputs of the Python print function, while
+        "text/plain" covers text reprs produced by executing the cell
+        with Shift + Enter or Ctrl + Enter commands.
+    """
+    output_type = output['output_type']
+
+    if output_type == "stream":
+        return 'stdout', _join_text(output['text'])
+
+    if output_type == "error":
+        return 'error', output['ename']
+
+    # Everything else displayable is a media output
+    if output_type not in ("display_data", "execute_result"):
+        return None
+
+    data = output['data']
+
+    # One hash-based intersection replaces probing every MIME key
+    hits = data.keys() & _MIME_SET
+    if not hits:
+        return None
+
+    if len(hits) == 1:
+        (mime,) = hits
+    else:
+        # Competing representations resolve by the order of importance
+        mime = next(key for key in _MIME_PRIORITY if key in hits)
+
+    if mime == _PLOTLY_KEY:
+        return 'plotly_fig', _parse_plotly_data(data[_PLOTLY_KEY])
+    if mime == _PNG_KEY:
+        return _PNG_KEY, data[_PNG_KEY].strip()
+    return mime, _join_text(data[mime])
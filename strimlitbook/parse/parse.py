@@ -1,355 +1,497 @@
-"""
-A module that contains classes to deal with Jupyter Notebooks
-"""
-import re
-from functools import partial
-import streamlit as st
-from ..utilities import _display_image, _display_dataframe, \
-    _display_plotly, _display_vega_lite
-
-from .outputs import _parse_error_output, _parse_stream_output, _parse_image_output, \
-    _parse_html_output, _parse_plotly_output, _parse_plain_text_output
-
-
-class StreamlitBook:
-    """
-    Main class to represent Jupyter Notebooks as Streamlit-compatible components
-
-    Attributes
-    ----------
-    cells : list
-        A list of Code or Markdown cells parsed from the notebook
-    n_cells : int
-        The total number of cells in the notebook. Only counts code and markdown cells.
-        Raw cells are ignored.
-
-    Methods
-    -------
-    display()
-        High-level function to display each cell input and output with corresponding
-         Streamlit functions.
-    """
-
-    def __init__(self, cells, metadata):
-        """
-        Parameters
-        ----------
-        cells : list
-            A list of Code/Markdown cells parsed from the raw JSON notebook code.
-        metadata : dict
-            A dictionary containing the metadata of the notebook.
-        """
-        self._metadata = metadata
-        self._code_language = self._metadata["kernelspec"]["language"]
-        self._cells = [
-            Code(cell, self._code_language) if cell['cell_type'] == 'code' else
-            Markdown(cell) for cell in cells
-        ]
-        self._cell_dict = cells
-        self._n_cells = len(self._cells)
-
-    @property
-    def cells(self):
-        return self._cells
-
-    @cells.deleter
-    def cells(self):
-        raise AttributeError("Cannot delete cells attribute...")
-
-    @property
-    def n_cells(self):
-        return self._n_cells
-
-    @n_cells.deleter
-    def n_cells(self):
-        raise AttributeError(
-            "Cannot delete n_cells attribute...")
-
-    def __repr__(self):
-        custom_repr = f"StreamlitBook()"
-        return custom_repr
-
-    def __str__(self):
-        custom_str = f"<StreamlitBook with {self.n_cells} cells>"
-        return custom_str
-
-    def __getitem__(self, idx: int):
-        """
-        Get the cell at the given index.
-        Parameters
-        ----------
-        idx : int
-            The index of the cell to get.
-
-        Returns
-        -------
-            cell: Code, Markdown, StreamlitBook
-                The returned value is either a code or markdown cell if a single index
-                is given. If a slice object, a StreamlitBook instance is returned.
-        """
-        if isinstance(idx, slice):
-            indices = range(*idx.indices(self._n_cells))
-            extracted_cells = [self._cells[i]._cell_dict for i in indices]
-
-            return StreamlitBook(extracted_cells, self._metadata)
-        return self._cells[idx]
-
-    def display(self):
-        """
-        High-level function to display each cell as a
-        Streamlit component with outputs.
-
-        Notes
-        -----
-            See the display function of Code and Markdown classes
-        """
-        for cell in self.cells:
-            cell.display()
-
-    def split(self, idx_to_split):
-        """
-        Split the book into two at the given index.
-
-        Parameters
-        ----------
-        idx_to_split: int:
-            Index of the cell to perform the split.
-            The second notebook will start from this index.
-
-        Returns
-        -------
-            tuple: A tuple of two StreamlitBook instances.
-        """
-        book1 = self._cell_dict[:idx_to_split]
-        book2 = self._cell_dict[idx_to_split:]
-
-        return self.__class__(book1, self._metadata), self.__class__(book2,
-                                                                     self._metadata)
-
-
-class Cell:
-    """
-    Generic cell class to make Jupyter Notebook cells streamlit-compatible.
-
-    Attributes
-    ----------
-    type : str
-        The type of the cell - either code or markdown
-    metadata : dict
-        The metadata of the cell. Contains the cell's tags and attachments.
-    source : str
-        The source code of the cell. Either code or markdown.
-    """
-
-    def __init__(self, cell_dict: dict):
-        """
-        Parameters
-        ----------
-        cell_dict : dict
-            A dictionary containing the cell's metadata, source and
-            outputs if the cell is a code cell.
-        """
-        self._type = cell_dict['cell_type']
-        self._metadata = cell_dict['metadata']
-        self._source = "".join(cell_dict['source'])
-        self._tags = self._metadata.get("tags", [])
-        self._cell_dict = cell_dict
-
-    @property
-    def type(self):
-        return self._type
-
-    @type.deleter
-    def type(self):
-        raise AttributeError("Cannot delete type attribute...")
-
-    @property
-    def metadata(self):
-        return self._metadata
-
-    @metadata.deleter
-    def metadata(self):
-        raise AttributeError("Cannot delete metadata attribute...")
-
-    @property
-    def source(self):
-        return self._source
-
-    @source.deleter
-    def source(self):
-        raise AttributeError("Cannot delete source attribute...")
-
-    def __repr__(self):
-        custom_repr = f"<StreamlitBook cell with type \"{self._type}\">"
-        return custom_repr
-
-    def __str__(self):
-        custom_str = f"<StreamlitBook cell with type \"{self._type}\">"
-        return custom_str
-
-
-class Markdown(Cell):
-    """
-    Subclass of the Cell class to represent Markdown cells with more features.
-    """
-
-    def __init__(self, cell_dict: dict):
-        super().__init__(cell_dict)
-        # Add an attribute for raw attachments
-        self._raw_attachments = cell_dict.get('attachments', None)
-
-    @property
-    def _attachments(self):
-        """
-        Parse cell attachments into an attribute.
-
-        Returns
-        -------
-        attach_list : list
-            A list of strings of the attachment contents.
-        """
-        # An empty list to store parsed attachments
-        attach_list = list()
-
-        # If there are attachments
-        if self._raw_attachments:
-            # For each attachment
-            for _, attachment in self._raw_attachments.items():
-                # Get the contents of each attachment
-                for _, value in attachment.items():
-                    attach_list.append(value)
-        return attach_list
-
-    def _display_parsing_attachments(self):
-        """
-        Lower-level display method that parses attachments (if any)
-        and displays them in proper media format with streamlit.
-        """
-
-        if self._attachments:
-            # Split the raw Markdown code at every line that has attachments
-            splitted_source = re.split(r"!\[.+]\(attachment:.+\)", self.source)
-
-            for index, source in enumerate(splitted_source):
-                st.markdown(source, unsafe_allow_html=True)
-                try:
-                    # TODO check if the below function works with GIFs
-                    _display_image(self._attachments[index])
-                except IndexError:
-                    pass
-        else:
-            st.markdown(self.source, unsafe_allow_html=True)
-
-    def display(self):
-        """
-        Higher-level function to display Markdown cells as streamlit components.
-        Display is performed based on tags.
-        """
-
-        if 'skip' in self._tags:
-            # Skip the markdown cell
-            return None
-        elif 'ci' in self._tags:
-            # Create a collapsed markdown cell in Streamlit
-            with st.expander("See collapsed cell"):
-                self._display_parsing_attachments()
-        else:
-            self._display_parsing_attachments()
-
-
-class Code(Cell):
-    """
-    Subclass of the Cell class to represent code cells with more features.
-    """
-
-    def __init__(self, cell_dict: dict, code_language):
-        super().__init__(cell_dict)
-        self._raw_data = cell_dict
-        self._language = code_language
-
-    @property
-    def _outputs(self):
-        """
-        Parse outputs of a cell as an attribute for ease of access.
-        """
-
-        # Check if there are any outputs
-        if len(self._raw_data['outputs']) == 0:
-            return None
-
-        # Store all parsing functions in the order of importance
-        parsing_functions = [_parse_stream_output, _parse_plotly_output,
-                             _parse_html_output, _parse_image_output,
-                             _parse_plain_text_output, _parse_error_output]
-
-        # Empty list to store parsed outputs
-        outputs = list()
-
-        # For each output of the cell
-        for output in self._raw_data['outputs']:
-            # Try to parse the output with each parsing function
-            for func in parsing_functions:
-                # TODO make sure that removing the ternary operator inside append
-                #  was not a mistake
-                outputs.append(func(output))
-
-        return [o for o in outputs if o is not None]
-
-    def _display_source(self):
-        """
-        Lower-level method to display cell code with Streamlit
-        """
-        if len(self.source) > 0:
-            st.code(self.source)
-
-    def _display_outputs(self):
-        """
-        A lower-level function to map different
-        _display_* functions to their specific outputs.
-        """
-
-        if self._outputs is None:
-            return None
-
-        # First, create a function to display code output with always the same
-        # language as the cell. Created mainly for Julia and R code cells.
-        # Because the default is Python.
-        _display_code = partial(st.code, language=self._language)
-
-        # Now, map outputs to their _display_* functions
-        display_keys = {
-            "plotly_fig": _display_plotly,
-            "altair_fig": _display_vega_lite,
-            "text/html": _display_dataframe,
-            "image/png": _display_image,
-            "text/plain": lambda x: _display_code(x),
-            "stdout": lambda x: _display_code(x),
-            "error": lambda x: st.error(x)
-        }
-
-        for output in self._outputs:
-            for key, value in output.items():
-                display_keys[key](value)
-
-    def display(self):
-        """
-        High-level display function to display cell source and outputs based on tags.
-        """
-
-        if 'skip' in self._tags:
-            return None
-        elif 'hi' in self._tags or 'hide_input' in self._tags:
-            self._display_outputs()
-        elif 'ho' in self._tags or 'hide_output' in self._tags:
-            self._display_source()
-        elif 'ci' in self._tags or 'collapsed_input' in self._tags:
-            with st.expander("See hidden source code..."):
-                self._display_source()
-            self._display_outputs()
-        elif 'co' in self._tags or 'collapsed_output' in self._tags:
-            self._display_source()
-            with st.expander("See hidden output..."):
-                self._display_outputs()
-        else:
-            self._display_source()
-            self._display_outputs()
+"""
+A module that contains classes to deal with Jupyter Notebooks
+"""
+import re
+
+from ..utilities import _display_image, _display_dataframe, \
+    _display_plotly, _display_vega_lite
+
+from .outputs import _parse_output, _join_text
+
+# Sentinel for "outputs not parsed yet" - None is a valid cached value
+_MISSING = object()
+
+# Matches markdown image references to cell attachments, e.g.
+# ![alt](attachment:image.png). Compiled once at import time; the negated
+# classes keep the match linear and stop a single greedy match from
+# swallowing two references on one line.
+_ATTACHMENT_RE = re.compile(r"!\[[^]]+]\(attachment:[^)]+\)")
+
+# Tag spellings that select each code-cell display mode, in the same
+# precedence order as the original if/elif chain in Code.display
+_SKIP_TAGS = frozenset(('skip',))
+_HIDE_INPUT_TAGS = frozenset(('hi', 'hide_input'))
+_HIDE_OUTPUT_TAGS = frozenset(('ho', 'hide_output'))
+_COLLAPSE_INPUT_TAGS = frozenset(('ci', 'collapsed_input'))
+_COLLAPSE_OUTPUT_TAGS = frozenset(('co', 'collapsed_output'))
+
+
+def _display_code_output(value, language):
+    """
+    Display a text/stdout output as a code block in the cell's own
+    language. Created mainly for Julia and R code cells, because the
+    streamlit default is Python.
+    """
+    import streamlit as st
+    st.code(value, language=language)
+
+
+def _display_error_output(value, language):
+    """
+    Display an error output as a streamlit error box.
+    """
+    import streamlit as st
+    st.error(value)
+
+
+# Maps display keys to their handler. Every handler takes the payload and
+# the cell's code language; built once at import instead of per render.
+_DISPLAY_KEYS = {
+    "plotly_fig": lambda value, language: _display_plotly(value),
+    "altair_fig": lambda value, language: _display_vega_lite(value),
+    "text/html": lambda value, language: _display_dataframe(value),
+    "image/png": lambda value, language: _display_image(value),
+    "text/plain": _display_code_output,
+    "stdout": _display_code_output,
+    "error": _display_error_output,
+}
+
+
+class StreamlitBook:
+    """
+    Main class to represent Jupyter Notebooks as Streamlit-compatible components
+
+    Attributes
+    ----------
+    cells : list
+        A list of Code or Markdown cells parsed from the notebook
+    n_cells : int
+        The total number of cells in the notebook. Only counts code and markdown cells.
+        Raw cells are ignored.
+
+    Methods
+    -------
+    display()
+        High-level function to display each cell input and output with corresponding
+         Streamlit functions.
+    """
+
+    def __init__(self, cells, metadata):
+        """
+        Parameters
+        ----------
+        cells : list
+            A list of Code/Markdown cells parsed from the raw JSON notebook code.
+        metadata : dict
+            A dictionary containing the metadata of the notebook.
+        """
+        self._metadata = metadata
+        self._code_language = self._metadata["kernelspec"]["language"]
+        # Bind the constructors and language as locals so the comprehension
+        # skips a global-name and attribute lookup for every cell
+        code, markdown, language = Code, Markdown, self._code_language
+        self._cells = [
+            code(cell, language) if cell['cell_type'] == 'code' else
+            markdown(cell) for cell in cells
+        ]
+        self._cell_dict = cells
+        self._n_cells = len(self._cells)
+
+    @classmethod
+    def _from_parsed(cls, cells, raw_cells, metadata):
+        """
+        Build a book around already-constructed cells, bypassing the
+        cell re-parsing done in __init__. Used by slicing and split().
+
+        Parameters
+        ----------
+        cells : list
+            Already-built Code/Markdown instances.
+        raw_cells : list
+            The raw cell dictionaries matching cells index for index.
+        metadata : dict
+            A dictionary containing the metadata of the notebook.
+        """
+        book = cls.__new__(cls)
+        book._metadata = metadata
+        book._code_language = metadata["kernelspec"]["language"]
+        book._cells = cells
+        book._cell_dict = raw_cells
+        book._n_cells = len(cells)
+        return book
+
+    @property
+    def cells(self):
+        return self._cells
+
+    @property
+    def n_cells(self):
+        return self._n_cells
+
+    def __repr__(self):
+        custom_repr = f"StreamlitBook()"
+        return custom_repr
+
+    def __str__(self):
+        custom_str = f"<StreamlitBook with {self.n_cells} cells>"
+        return custom_str
+
+    def __getitem__(self, idx: int):
+        """
+        Get the cell at the given index.
+        Parameters
+        ----------
+        idx : int
+            The index of the cell to get.
+
+        Returns
+        -------
+            cell: Code, Markdown, StreamlitBook
+                The returned value is either a code or markdown cell if a single index
+                is given. If a slice object, a StreamlitBook instance is returned.
+        """
+        if isinstance(idx, slice):
+            # Reuse the already-parsed cell objects instead of pushing
+            # the raw dicts through __init__ again
+            extracted_cells = self._cells[idx]
+            extracted_raw = [cell._cell_dict for cell in extracted_cells]
+
+            return self.__class__._from_parsed(extracted_cells, extracted_raw,
+                                               self._metadata)
+        return self._cells[idx]
+
+    def display(self):
+        """
+        High-level function to display each cell as a
+        Streamlit component with outputs.
+
+        Notes
+        -----
+            See the display function of Code and Markdown classes
+        """
+        import streamlit as st
+
+        # Group the whole book under one container so its elements land
+        # in a single frontend block instead of the top-level flow
+        with st.container():
+            for cell in self.cells:
+                cell.display()
+
+    def split(self, idx_to_split):
+        """
+        Split the book into two at the given index.
+
+        Parameters
+        ----------
+        idx_to_split: int:
+            Index of the cell to perform the split.
+            The second notebook will start from this index.
+
+        Returns
+        -------
+            tuple: A tuple of two StreamlitBook instances.
+        """
+        # Slice the parsed cells and their raw dicts in parallel; neither
+        # half re-parses a single cell
+        from_parsed = self.__class__._from_parsed
+        book1 = from_parsed(self._cells[:idx_to_split],
+                            self._cell_dict[:idx_to_split], self._metadata)
+        book2 = from_parsed(self._cells[idx_to_split:],
+                            self._cell_dict[idx_to_split:], self._metadata)
+
+        return book1, book2
+
+
+class Cell:
+    """
+    Generic cell class to make Jupyter Notebook cells streamlit-compatible.
+
+    Attributes
+    ----------
+    type : str
+        The type of the cell - either code or markdown
+    metadata : dict
+        The metadata of the cell. Contains the cell's tags and attachments.
+    source : str
+        The source code of the cell. Either code or markdown.
+    """
+
+    # Slots keep per-cell memory low for large notebooks and make
+    # attribute access a bit faster than a __dict__ lookup.
+    __slots__ = ('_type', '_metadata', '_source', '_tags', '_cell_dict')
+
+    def __init__(self, cell_dict: dict):
+        """
+        Parameters
+        ----------
+        cell_dict : dict
+            A dictionary containing the cell's metadata, source and
+            outputs if the cell is a code cell.
+        """
+        self._type = cell_dict['cell_type']
+        self._metadata = cell_dict['metadata']
+        self._source = _join_text(cell_dict['source'])
+        # Tags are only ever membership-tested, so a frozenset beats the
+        # raw list on every display() dispatch
+        self._tags = frozenset(self._metadata.get("tags", ()))
+        self._cell_dict = cell_dict
+
+    @property
+    def type(self):
+        return self._type
+
+    @property
+    def metadata(self):
+        return self._metadata
+
+    @property
+    def source(self):
+        return self._source
+
+    def __repr__(self):
+        custom_repr = f"<StreamlitBook cell with type \"{self._type}\">"
+        return custom_repr
+
+    def __str__(self):
+        custom_str = f"<StreamlitBook cell with type \"{self._type}\">"
+        return custom_str
+
+
+class Markdown(Cell):
+    """
+    Subclass of the Cell class to represent Markdown cells with more features.
+    """
+
+    __slots__ = ('_raw_attachments', '_attachments_cache', '_display_mode')
+
+    def __init__(self, cell_dict: dict):
+        super().__init__(cell_dict)
+        # Add an attribute for raw attachments
+        self._raw_attachments = cell_dict.get('attachments', None)
+        self._attachments_cache = _MISSING
+        self._display_mode = self._resolve_display_mode()
+
+    def _resolve_display_mode(self):
+        """
+        Resolve the cell's tags into one display mode, mirroring the
+        mode precomputation done for code cells.
+        """
+        tags = self._tags
+        if tags & _SKIP_TAGS:
+            return 'skip'
+        if 'ci' in tags:
+            return 'collapse'
+        return 'default'
+
+    @property
+    def _attachments(self):
+        """
+        Parse cell attachments into an attribute.
+        Parsed once on first access and cached, since the display path
+        reads this property several times per render.
+
+        Returns
+        -------
+        attach_list : list
+            A list of strings of the attachment contents.
+        """
+        if self._attachments_cache is _MISSING:
+            self._attachments_cache = self._parse_attachments()
+        return self._attachments_cache
+
+    def _parse_attachments(self):
+        """
+        Parse the raw attachments of the cell into a list of contents.
+        """
+        # An empty list to store parsed attachments
+        attach_list = list()
+
+        # If there are attachments
+        if self._raw_attachments:
+            # For each attachment
+            for _, attachment in self._raw_attachments.items():
+                # Get the contents of each attachment
+                for _, value in attachment.items():
+                    attach_list.append(value)
+        return attach_list
+
+    def _display_parsing_attachments(self):
+        """
+        Lower-level display method that parses attachments (if any)
+        and displays them in proper media format with streamlit.
+        """
+        import streamlit as st
+
+        attachments = self._attachments
+        if attachments:
+            source = self.source
+            n_attachments = len(attachments)
+            index = 0
+            pos = 0
+
+            # Cheap C-level substring scan first - only sources that
+            # actually reference an attachment pay for the regex walk
+            if "](attachment:" in source:
+                # One finditer pass pairs the text before each reference
+                # with its attachment; no split list, no IndexError
+                # control flow
+                for match in _ATTACHMENT_RE.finditer(source):
+                    st.markdown(source[pos:match.start()],
+                                unsafe_allow_html=True)
+                    if index < n_attachments:
+                        # TODO check if the below function works with GIFs
+                        _display_image(attachments[index])
+                    index += 1
+                    pos = match.end()
+
+            # The text after the last reference (or the whole source when
+            # nothing is referenced inline)
+            st.markdown(source[pos:], unsafe_allow_html=True)
+            if index < n_attachments:
+                _display_image(attachments[index])
+        else:
+            st.markdown(self.source, unsafe_allow_html=True)
+
+    def display(self):
+        """
+        Higher-level function to display Markdown cells as streamlit components.
+        Display is performed based on the display mode resolved from the tags.
+        """
+        import streamlit as st
+
+        mode = self._display_mode
+        if mode == 'skip':
+            # Skip the markdown cell
+            return None
+        elif mode == 'collapse':
+            # Create a collapsed markdown cell in Streamlit
+            with st.expander("See collapsed cell"):
+                self._display_parsing_attachments()
+        else:
+            self._display_parsing_attachments()
+
+
+class Code(Cell):
+    """
+    Subclass of the Cell class to represent code cells with more features.
+    """
+
+    __slots__ = ('_raw_outputs', '_language', '_outputs_cache', '_display_mode')
+
+    def __init__(self, cell_dict: dict, code_language):
+        super().__init__(cell_dict)
+        # Keep only the outputs list - the rest of the cell dict is
+        # already unpacked by Cell.__init__
+        self._raw_outputs = cell_dict.get('outputs', [])
+        self._language = code_language
+        self._outputs_cache = _MISSING
+        self._display_mode = self._resolve_display_mode()
+
+    def _resolve_display_mode(self):
+        """
+        Resolve the cell's tags into one display mode, so display() does
+        a single comparison per rerun instead of re-testing every tag.
+        """
+        tags = self._tags
+        if tags & _SKIP_TAGS:
+            return 'skip'
+        if tags & _HIDE_INPUT_TAGS:
+            return 'hide_input'
+        if tags & _HIDE_OUTPUT_TAGS:
+            return 'hide_output'
+        if tags & _COLLAPSE_INPUT_TAGS:
+            return 'collapse_input'
+        if tags & _COLLAPSE_OUTPUT_TAGS:
+            return 'collapse_output'
+        return 'default'
+
+    @property
+    def _outputs(self):
+        """
+        Parse outputs of a cell as an attribute for ease of access.
+        Parsed once on first access and cached - notebooks are immutable
+        after load, and display() reads this property more than once.
+        """
+        if self._outputs_cache is _MISSING:
+            self._outputs_cache = self._parse_outputs()
+        return self._outputs_cache
+
+    def _parse_outputs(self):
+        """
+        Parse the raw outputs of the cell into a list of parsed outputs.
+        """
+
+        # Check if there are any outputs
+        if len(self._raw_outputs) == 0:
+            return None
+
+        # Empty list to store parsed outputs
+        outputs = list()
+
+        # For each output of the cell
+        for output in self._raw_outputs:
+            parsed = _parse_output(output)
+            # Skip outputs that carry nothing displayable
+            if parsed is not None:
+                outputs.append(parsed)
+
+        return outputs
+
+    def _display_source(self):
+        """
+        Lower-level method to display cell code with Streamlit
+        """
+        import streamlit as st
+        if len(self.source) > 0:
+            st.code(self.source)
+
+    def _display_outputs(self):
+        """
+        A lower-level function to map different
+        _display_* functions to their specific outputs.
+        """
+        outputs = self._outputs
+        if outputs is None:
+            return None
+
+        language = self._language
+        # Coalesce runs of text outputs (stdout and text reprs) into one
+        # st.code block, so a print-heavy cell emits a single frontend
+        # element instead of one per output
+        text_buffer = []
+        for key, value in outputs:
+            if key in ('stdout', 'text/plain'):
+                text_buffer.append(value)
+                continue
+            if text_buffer:
+                _display_code_output('\n'.join(text_buffer), language)
+                text_buffer = []
+            _DISPLAY_KEYS[key](value, language)
+        if text_buffer:
+            _display_code_output('\n'.join(text_buffer), language)
+
+    def display(self):
+        """
+        High-level display function to display cell source and outputs
+        based on the display mode resolved from the tags.
+        """
+        import streamlit as st
+
+        mode = self._display_mode
+        if mode == 'skip':
+            return None
+        elif mode == 'hide_input':
+            self._display_outputs()
+        elif mode == 'hide_output':
+            self._display_source()
+        elif mode == 'collapse_input':
+            with st.expander("See hidden source code..."):
+                self._display_source()
+            self._display_outputs()
+        elif mode == 'collapse_output':
+            self._display_source()
+            with st.expander("See hidden output..."):
+                self._display_outputs()
+        else:
+            self._display_source()
+            self._display_outputs()
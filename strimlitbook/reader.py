@@ -1,28 +1,96 @@
-"""
-A module that contains a global Jupyter Notebook parser to read them from path
-and return a StreamlitBook instance.
-
-"""
-
-from . import StreamlitBook
-import json
-
-
-def read_ipynb(path: str) -> StreamlitBook:
-    """Global function to read raw Jupyter notebook JSON and pass them into
-    an instance of StreamlitBook class
-
-    Parameters
-    ----------
-    path: str :
-        Path to the notebook
-
-    Returns
-    -------
-    notebook: StreamlitBook
-        An instance of StreamlitBook class.
-    """
-    with open(path, "rb") as file:
-        raw_dict = json.load(file)
-
-    return StreamlitBook(raw_dict['cells'], raw_dict['metadata'])
+"""
+A module that contains a global Jupyter Notebook parser to read them from path
+and return a StreamlitBook instance.
+
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from . import StreamlitBook
+import orjson
+
+
+def read_ipynb(path: str) -> StreamlitBook:
+    """Global function to read raw Jupyter notebook JSON and pass them into
+    an instance of StreamlitBook class
+
+    Parameters
+    ----------
+    path: str :
+        Path to the notebook
+
+    Returns
+    -------
+    notebook: StreamlitBook
+        An instance of StreamlitBook class.
+    """
+    # orjson parses the notebook JSON several times faster than the stdlib
+    # json module, which matters for notebooks with large embedded outputs
+    raw_dict = orjson.loads(Path(path).read_bytes())
+
+    return StreamlitBook(raw_dict['cells'], raw_dict['metadata'])
+
+
+def _read_ipynb_keyed(path: str, mtime: float) -> StreamlitBook:
+    # mtime is unused here; it only widens the cache key so that saving
+    # the notebook invalidates the cached book. It must not start with
+    # an underscore - streamlit excludes such parameters from the key.
+    return read_ipynb(path)
+
+
+# Lazily-built cache_resource wrapper around _read_ipynb_keyed; streamlit
+# is only imported (and the decorator only applied) on first use
+_cached_reader = None
+
+
+def read_ipynb_cached(path: str) -> StreamlitBook:
+    """Read a notebook once and reuse it across Streamlit reruns.
+
+    Wraps read_ipynb in st.cache_resource keyed by the path and its
+    modification time, so widget interactions do not re-read and
+    re-parse the notebook on every rerun, while saving the notebook
+    still triggers a re-parse. The same book instance is shared between
+    reruns - treat it as read-only.
+
+    Parameters
+    ----------
+    path: str :
+        Path to the notebook
+
+    Returns
+    -------
+    notebook: StreamlitBook
+        The cached StreamlitBook instance for the path.
+    """
+    global _cached_reader
+    if _cached_reader is None:
+        import streamlit as st
+        # Older streamlit releases shipped the same behavior under the
+        # experimental_singleton name
+        cache = getattr(st, "cache_resource", None) or st.experimental_singleton
+        _cached_reader = cache(show_spinner=False)(_read_ipynb_keyed)
+    return _cached_reader(path, os.path.getmtime(path))
+
+
+def read_ipynbs(paths) -> list:
+    """Read several Jupyter notebooks concurrently.
+
+    Useful for multi-chapter apps where each chapter is a separate
+    notebook; the file reads overlap in a thread pool while parsing
+    stays in-process, so no pickling of the parsed books is needed.
+
+    Parameters
+    ----------
+    paths: list :
+        Paths to the notebooks.
+
+    Returns
+    -------
+    notebooks: list
+        A list of StreamlitBook instances, in the order of the
+        given paths.
+    """
+    with ThreadPoolExecutor() as executor:
+        return list(executor.map(read_ipynb, paths))
@@ -1,114 +1,188 @@
-"""
-A module that contains utility functions.
-"""
-
-import base64
-from PIL import Image
-import io
-
-import pandas as pd
-import numpy as np
-import streamlit as st
-import plotly.graph_objects as go
-
-
-def _create_white_bg(image_string: str):
-    """
-    Take a base64 encoded image, convert it to bytes and
-    create a white background image with the same shape as the image.
-
-    Parameters
-    ----------
-    image_string: str
-        base64 encoded string of an image
-
-    Returns
-    -------
-        White background image with the same shape as input image.
-    """
-    # Convert to bytes code from the image base64 string
-    bytes_image = base64.decodebytes(str.encode(image_string))
-
-    # Create a temporary image from the bytes
-    temp_image = Image.open(io.BytesIO(bytes_image))
-    width, height = temp_image.width, temp_image.height
-
-    white_image_array = 255 * np.ones((height, width, 3), np.uint8)
-    white_pil_image = Image.fromarray(white_image_array)
-
-    return white_pil_image
-
-
-def _display_image(image_string: str):
-    """
-    Convert base64 encoded images to bytes and display as streamlit media.
-
-    Parameters
-    ----------
-    image_string: str :
-        base64 encoded string of an image.
-    """
-    # Convert to bytes code from the image base64 string
-    bytes_image = base64.decodebytes(str.encode(image_string))
-
-    # Generate a white background image
-    pil_image_white = _create_white_bg(image_string)
-    # Convert the original bytes image to PIL image
-    pil_image_colored = Image.open(io.BytesIO(bytes_image))
-    # Paste the original bytes image on the white background image
-    pil_image_white.paste(pil_image_colored, (0, 0))
-
-    # Display the final image with streamlit
-    st.image(pil_image_white, use_column_width="auto")
-
-
-def _display_dataframe(html_df: str):
-    """
-    Static, lower-level method to retrieve a DataFrame from HTML code
-    that gets rendered under the hood of a Jupyter Cell.
-
-    Parameters
-    ----------
-    html_df: str :
-        Raw HTML code that contains <table> tag.
-    """
-
-    # TODO catch the exception where there aren't any tables in the html
-    # TODO work on the columns of the dataframes more closely
-    df = pd.read_html(html_df)[0]
-    df.rename(lambda x: "" if "Unnamed:" in x else x, axis='columns', inplace=True)
-    st.dataframe(df.set_index(df.columns[0]))
-
-
-def _display_plotly(fig_dict: dict):
-    """
-    Static, lower-level method to display Plotly figures from a figure
-    dictionaries parsed inside _outputs.
-
-    Parameters
-    ----------
-    fig_dict: dict :
-        Plotly figure dictionary parsed from raw outputs inside _outputs.
-    """
-
-    fig = go.Figure(dict(data=fig_dict['data'], layout=fig_dict['layout']))
-
-    # If config key exists in Plotly output dict, use it to override the default config
-    if fig_dict['config'] is not None:
-        st.plotly_chart(fig, config=fig_dict['config'])
-    else:
-        st.plotly_chart(fig)
-
-
-# TODO check if altair charts can be rendered using st.markdown function
-def _display_vega_lite(vega_lite_spec: dict):
-    """
-    Static, lower-level method to display Altair charts.
-
-    Parameters
-    ----------
-    vega_lite_spec: dict :
-        Altair chart dictionary spec parsed from raw outputs inside _outputs.
-    """
-
-    st.vega_lite_chart(spec=vega_lite_spec)
+"""
+A module that contains utility functions.
+
+The heavyweight libraries (streamlit, pandas, numpy, PIL, plotly, lxml)
+are imported inside the functions that need them, so importing the
+package for purely programmatic parsing stays cheap.
+"""
+
+import base64
+import io
+
+
+def _create_white_bg(image):
+    """
+    Create a white background image with the same shape as the given image.
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        The already-decoded image whose size the background should match.
+
+    Returns
+    -------
+        White background image with the same shape as input image.
+    """
+    from PIL import Image
+
+    # A single C-level fill; no numpy broadcast and array-to-PIL copy
+    return Image.new("RGB", (image.width, image.height), (255, 255, 255))
+
+
+def _decode_image(image_string: str):
+    """
+    Decode a base64 image payload into the PIL image to display.
+
+    Parameters
+    ----------
+    image_string: str :
+        base64 encoded string of an image.
+
+    Returns
+    -------
+        The decoded PIL image, composited onto a white background when
+        the image carries transparency.
+    """
+    from PIL import Image
+
+    # Decode the base64 payload and open the image once; b64decode takes
+    # the string directly and skips decodebytes' line-by-line handling.
+    bytes_image = base64.b64decode(image_string)
+    pil_image = Image.open(io.BytesIO(bytes_image))
+
+    # Only images that can actually be transparent need the white
+    # background; fully opaque PNGs (the common matplotlib output) are
+    # displayed as-is
+    if pil_image.mode in ("RGBA", "LA", "PA") or \
+            "transparency" in pil_image.info:
+        # Normalize to RGBA and paste with the image as its own mask so
+        # the alpha channel blends against the white background instead
+        # of the raw color values overwriting it
+        pil_image = pil_image.convert("RGBA")
+        pil_image_white = _create_white_bg(pil_image)
+        pil_image_white.paste(pil_image, (0, 0), pil_image)
+        pil_image = pil_image_white
+
+    return pil_image
+
+
+# Lazily-built cache_data wrapper around _decode_image, so reruns reuse
+# the decoded image instead of re-decompressing the PNG
+_decode_image_cached = None
+
+
+def _display_image(image_string: str):
+    """
+    Convert base64 encoded images to bytes and display as streamlit media.
+
+    Parameters
+    ----------
+    image_string: str :
+        base64 encoded string of an image.
+    """
+    import streamlit as st
+
+    global _decode_image_cached
+    if _decode_image_cached is None:
+        # Older streamlit releases shipped the same behavior under the
+        # experimental_memo name
+        cache = getattr(st, "cache_data", None) or st.experimental_memo
+        _decode_image_cached = cache(show_spinner=False,
+                                     max_entries=128)(_decode_image)
+
+    # Display the final image with streamlit
+    st.image(_decode_image_cached(image_string), use_column_width="auto")
+
+
+def _display_dataframe(html_df: str):
+    """
+    Static, lower-level method to retrieve a DataFrame from HTML code
+    that gets rendered under the hood of a Jupyter Cell.
+
+    Parameters
+    ----------
+    html_df: str :
+        Raw HTML code that contains <table> tag.
+    """
+    import pandas as pd
+    import streamlit as st
+    from lxml import html as lxml_html
+
+    # TODO catch the exception where there aren't any tables in the html
+    # Extract the first table directly with lxml - much lighter than
+    # pd.read_html, which parses every table and runs type inference
+    root = lxml_html.fromstring(html_df)
+    # .find only searches descendants, so a bare table with no wrapper
+    # div (the root element itself) has to be matched directly
+    table = root if root.tag == "table" else root.find(".//table")
+
+    headers = []
+    rows = []
+    if table is not None:
+        # Only the first thead row carries the column labels; pandas
+        # emits a second row when the index or columns have a name, and
+        # counting its cells too would widen headers past the body rows
+        header_row = table.find(".//thead/tr")
+        if header_row is not None:
+            headers = [cell.text_content().strip()
+                       for cell in header_row.iterchildren("th", "td")]
+        # Body rows keep the index cell (a <th>) in front of the <td> cells
+        rows = [[cell.text_content()
+                 for cell in row.iterchildren("th", "td")]
+                for row in table.findall(".//tbody/tr")]
+
+    if table is None or (rows and headers and len(headers) != len(rows[0])):
+        # MultiIndex columns (colspan headers) and other layouts the flat
+        # extraction can't express - let pandas reconstruct the frame
+        df = pd.read_html(io.StringIO(html_df))[0]
+        # read_html fills anonymous header cells with "Unnamed: ..."
+        # placeholders; scrub them back to empty strings. MultiIndex
+        # columns arrive as tuples, so scrub each level
+        df.columns = [
+            tuple("" if str(part).startswith("Unnamed:") else part
+                  for part in col) if isinstance(col, tuple)
+            else ("" if str(col).startswith("Unnamed:") else col)
+            for col in df.columns
+        ]
+    else:
+        df = pd.DataFrame(rows, columns=headers or None)
+    st.dataframe(df.set_index(df.columns[0]))
+
+
+def _display_plotly(fig_dict: dict):
+    """
+    Static, lower-level method to display Plotly figures from a figure
+    dictionaries parsed inside _outputs.
+
+    Parameters
+    ----------
+    fig_dict: dict :
+        Plotly figure dictionary parsed from raw outputs inside _outputs.
+    """
+    import streamlit as st
+
+    # st.plotly_chart accepts a plain figure dict; skipping the go.Figure
+    # constructor avoids plotly's per-trace validation and deep copies.
+    # The notebook already rendered this figure, so it is known-valid.
+    fig = {"data": fig_dict['data'], "layout": fig_dict['layout']}
+
+    # If config key exists in Plotly output dict, use it to override the default config
+    if fig_dict['config'] is not None:
+        st.plotly_chart(fig, config=fig_dict['config'])
+    else:
+        st.plotly_chart(fig)
+
+
+# TODO check if altair charts can be rendered using st.markdown function
+def _display_vega_lite(vega_lite_spec: dict):
+    """
+    Static, lower-level method to display Altair charts.
+
+    Parameters
+    ----------
+    vega_lite_spec: dict :
+        Altair chart dictionary spec parsed from raw outputs inside _outputs.
+    """
+    import streamlit as st
+
+    st.vega_lite_chart(spec=vega_lite_spec)